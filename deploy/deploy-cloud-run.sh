@@ -69,7 +69,7 @@ gcloud run deploy "$SERVICE_NAME" \
     --timeout "$TIMEOUT" \
     --concurrency "$CONCURRENCY" \
     --no-allow-unauthenticated \
-    --set-env-vars "LOG_LEVEL=INFO" \
+    --set-env-vars "LOG_LEVEL=INFO,WEB_CONCURRENCY=1" \
     --set-secrets "KEYCLOAK_BASE_URL=KEYCLOAK_BASE_URL:latest,\
 KEYCLOAK_REALM=KEYCLOAK_REALM:latest,\
 KEYCLOAK_CLIENT_ID=KEYCLOAK_CLIENT_ID:latest,\
@@ -47,7 +47,8 @@ if [ -z "$SERVICE_URL" ]; then
     exit 1
 fi
 
-SYNC_URL="${SERVICE_URL}/sync"
+# wait=true keeps the request open for the whole sync, so Cloud Run keeps the instance active
+SYNC_URL="${SERVICE_URL}/sync?wait=true"
 HEALTH_URL="${SERVICE_URL}/health"
 
 echo "Service URL: $SERVICE_URL"
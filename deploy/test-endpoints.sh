@@ -80,7 +80,7 @@ if [[ "$response" =~ ^([yY][eE][sS]|[yY])$ ]]; then
     SYNC_RESPONSE=$(curl -w "\n%{http_code}" \
         -X POST \
         -H "Authorization: Bearer $TOKEN" \
-        "$SERVICE_URL/sync")
+        "$SERVICE_URL/sync?wait=true")
     
     SYNC_CODE=$(echo "$SYNC_RESPONSE" | tail -n1)
     SYNC_BODY=$(echo "$SYNC_RESPONSE" | sed '$d')
@@ -0,0 +1,49 @@
+"""Gunicorn configuration for the HTTP server (Cloud Run mode).
+
+Start with: gunicorn -c gunicorn_conf.py src.server:app
+"""
+import os
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# A single worker process by default: sync jobs, their status records and the
+# lock that serializes syncs all live in process memory, so with several
+# workers a status poll can miss its job and two syncs can run at once.
+# Concurrency for /health and status polls comes from threads instead.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Threaded workers rather than gevent: the sync runs its own thread pools and the
+# IAM check uses gRPC, neither of which mixes well with gevent monkey-patching.
+# Threads still let /health be served while a /sync blocks on outbound I/O.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# A sync can run for as long as the Cloud Run request timeout (max 60 minutes)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 3600))
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app (settings, exporter, auth state) once in the master. Downstream
+# connections are opened per worker in post_worker_init, never before the fork,
+# so workers don't share pooled sockets.
+preload_app = True
+
+
+def post_worker_init(worker):
+    """
+    Tune the worker's GC and warm its Keycloak and Glean connection pools before it takes requests.
+
+    The Glean connection is not pre-warmed in HTTP/2 mode (GLEAN_USE_HTTP2).
+    """
+    import gc
+
+    from src.server import GC_THRESHOLD, warmup_exporter
+
+    gc.set_threshold(*GC_THRESHOLD)
+    warmup_exporter()
+
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
@@ -1,20 +1,122 @@
 """Authentication and authorization for Cloud Run deployment."""
+import hashlib
 import logging
 import os
+import re
+import threading
+import time
 from functools import wraps
-from typing import Optional
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
+import requests
 from flask import request, jsonify
-from google.auth.transport import requests as google_requests
 from google.cloud import resourcemanager_v3
 from google.iam.v1 import iam_policy_pb2
+from requests.adapters import HTTPAdapter
 import google.auth
+import google.auth.jwt
 
 
 logger = logging.getLogger(__name__)
 
 # Cache the project ID after first retrieval
 _cached_project_id: Optional[str] = None
+_project_id_lock = threading.Lock()
+
+# Shared Resource Manager client (gRPC channel setup is expensive)
+_projects_client: Optional[resourcemanager_v3.ProjectsClient] = None
+_projects_client_lock = threading.Lock()
+
+
+class _TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (capped at the cache TTL)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                self._evict(now)
+            self._data[key] = (now + ttl, value)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the oldest ones if still full. Caller holds the lock."""
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at <= now]:
+            del self._data[key]
+        while len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+# How long (seconds) a successful token verification is reused; entries never
+# outlive the token's own expiry
+AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', '300'))
+
+# Verified tokeninfo responses keyed by a hash of the token (never the raw token)
+_token_cache = _TTLCache(maxsize=4096, ttl=AUTH_CACHE_TTL)
+
+# Cloud Run Invoker permission results keyed by (email, project_id)
+_iam_cache = _TTLCache(maxsize=2048, ttl=60)
+
+# Keep-alive session for tokeninfo calls so TLS handshakes are amortized
+_tokeninfo_session = requests.Session()
+_tokeninfo_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+
+# Expected audience for locally verified ID tokens (e.g. the Cloud Run service URL).
+# When unset, every token is verified through the tokeninfo endpoint.
+_AUTH_AUDIENCE: Optional[str] = os.environ.get('AUTH_AUDIENCE') or None
+
+# Skip the per-request IAM check when Cloud Run's own IAM gate already enforces
+# run.invoker (i.e. the service has no allUsers binding). Tokens are still verified.
+SKIP_IAM_CHECK = os.environ.get('SKIP_IAM_CHECK', '').lower() == 'true'
+
+# Turn authentication off entirely (local development only). When disabled,
+# require_auth/optional_auth return the endpoint unchanged.
+AUTH_ENABLED = os.environ.get('AUTH_ENABLED', 'true').lower() in ('true', '1', 'yes')
+
+# Project-level roles that include run.routes.invoke
+_INVOKER_ROLES = frozenset({'roles/run.invoker', 'roles/run.admin', 'roles/owner', 'roles/editor'})
+
+_TOKENINFO_URL = 'https://oauth2.googleapis.com/tokeninfo'
+_GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+_GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+_DEFAULT_CERTS_MAX_AGE = 3600
+
+# Google's ID token signing certificates, refreshed per Cache-Control max-age
+_google_certs: Dict[str, str] = {}
+_google_certs_expiry: float = 0.0
+_google_certs_lock = threading.Lock()
+
+
+def _token_cache_key(token: str) -> str:
+    """Return a non-reversible cache key for a bearer token."""
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
 
 
 def get_project_id() -> str:
@@ -22,7 +124,9 @@ def get_project_id() -> str:
     Get the GCP project ID from the Cloud Run environment.
     
     Cloud Run automatically sets the project context. This function
-    retrieves it from the application default credentials.
+    checks the standard project environment variables first and then
+    falls back to the application default credentials. The result is
+    cached for the lifetime of the process.
     
     Returns:
         The GCP project ID where the Cloud Run service is running
@@ -35,20 +139,24 @@ def get_project_id() -> str:
     if _cached_project_id:
         return _cached_project_id
     
-    try:
-        _, project_id = google.auth.default()
+    with _project_id_lock:
+        if _cached_project_id:
+            return _cached_project_id
+        
+        project_id = os.environ.get('GOOGLE_CLOUD_PROJECT') or os.environ.get('GCP_PROJECT') or os.environ.get('GCLOUD_PROJECT')
         if project_id:
             _cached_project_id = project_id
-            logger.info(f"Detected GCP project ID: {project_id}")
+            logger.info("Using project ID from environment: %s", project_id)
             return project_id
-    except Exception as e:
-        logger.warning(f"Could not detect project from default credentials: {e}")
-    
-    project_id = os.environ.get('GOOGLE_CLOUD_PROJECT') or os.environ.get('GCP_PROJECT') or os.environ.get('GCLOUD_PROJECT')
-    if project_id:
-        _cached_project_id = project_id
-        logger.info(f"Using project ID from environment: {project_id}")
-        return project_id
+        
+        try:
+            _, project_id = google.auth.default()
+            if project_id:
+                _cached_project_id = project_id
+                logger.info("Detected GCP project ID: %s", project_id)
+                return project_id
+        except Exception as e:
+            logger.warning("Could not detect project from default credentials: %s", e)
     
     raise RuntimeError(
         "Unable to determine GCP project ID. This service must run in a GCP environment "
@@ -56,17 +164,146 @@ def get_project_id() -> str:
     )
 
 
+def init_auth_module() -> None:
+    """
+    Resolve process-wide auth state up front.
+    
+    Called once at application startup so the first authenticated request
+    does not pay for project ID detection. Failures are logged and retried
+    lazily on the first request.
+    """
+    if not AUTH_ENABLED:
+        logger.warning("Authentication is DISABLED (AUTH_ENABLED=false); all endpoints are public")
+        return
+    
+    try:
+        get_project_id()
+    except RuntimeError as e:
+        logger.warning("Deferring project ID detection: %s", e)
+
+
 class AuthError(Exception):
     """Custom exception for authentication errors."""
+    __slots__ = ('message', 'status_code')
+    
     def __init__(self, message: str, status_code: int = 401):
         self.message = message
         self.status_code = status_code
         super().__init__(self.message)
 
 
+def _is_jwt(token: str) -> bool:
+    """Return True if the token looks like a signed JWT (ID token) rather than an opaque access token."""
+    if token.count('.') != 2:
+        return False
+    try:
+        header = google.auth.jwt.decode_header(token)
+    except ValueError:
+        return False
+    return isinstance(header, dict) and 'alg' in header
+
+
+def _get_google_certs(force_refresh: bool = False) -> Dict[str, str]:
+    """
+    Return Google's ID token signing certificates, keyed by key ID.
+    
+    Certificates are cached in-process for the max-age advertised by the
+    certs endpoint and refetched early when a token references an unknown
+    key ID.
+    """
+    global _google_certs, _google_certs_expiry
+    
+    now = time.monotonic()
+    if not force_refresh and _google_certs and now < _google_certs_expiry:
+        return _google_certs
+    
+    with _google_certs_lock:
+        now = time.monotonic()
+        if not force_refresh and _google_certs and now < _google_certs_expiry:
+            return _google_certs
+        
+        response = _tokeninfo_session.get(_GOOGLE_CERTS_URL, timeout=5)
+        response.raise_for_status()
+        
+        max_age = _DEFAULT_CERTS_MAX_AGE
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+        if match:
+            max_age = int(match.group(1))
+        
+        _google_certs = response.json()
+        _google_certs_expiry = now + max_age
+        logger.debug("Refreshed %d Google signing certificates (max-age %ss)", len(_google_certs), max_age)
+        return _google_certs
+
+
+def _verify_id_token(token: str) -> dict:
+    """
+    Verify a Google-signed ID token locally against the cached signing certificates.
+    
+    Raises:
+        ValueError: If the signature, audience, issuer or expiry is invalid
+    """
+    try:
+        claims = google.auth.jwt.decode(
+            token, certs=_get_google_certs(), audience=_AUTH_AUDIENCE, clock_skew_in_seconds=10
+        )
+    except ValueError as e:
+        if 'Certificate for key id' not in str(e):
+            raise
+        # Google rotated its keys since the last fetch
+        claims = google.auth.jwt.decode(
+            token, certs=_get_google_certs(force_refresh=True), audience=_AUTH_AUDIENCE, clock_skew_in_seconds=10
+        )
+    
+    if claims.get('iss') not in _GOOGLE_ISSUERS:
+        raise ValueError(f"Invalid token issuer: {claims.get('iss')}")
+    
+    if claims.get('email') and not claims.get('email_verified', False):
+        raise ValueError("Token email is not verified")
+    
+    return claims
+
+
+def _verify_access_token(token: str) -> dict:
+    """
+    Verify an opaque access token with Google's tokeninfo endpoint.
+    
+    Raises:
+        ValueError: If the token is rejected by Google
+    """
+    response = _tokeninfo_session.get(
+        _TOKENINFO_URL,
+        params={'access_token': token},
+        timeout=5,
+    )
+    
+    if response.status_code != 200:
+        raise ValueError(f"Token verification failed with status {response.status_code}")
+    
+    token_info = response.json()
+    
+    # Verify token has not expired
+    if 'error' in token_info:
+        raise ValueError(f"Invalid token: {token_info.get('error_description', 'Unknown error')}")
+    
+    # Check if token has required scope (optional but recommended)
+    scopes = token_info.get('scope', '').split()
+    logger.debug("Token scopes: %s", scopes)
+    
+    return token_info
+
+
 def verify_token(token: str) -> dict:
     """
-    Verify and decode Google Cloud access token.
+    Verify and decode a Google Cloud access token or ID token.
+    
+    When AUTH_AUDIENCE is configured, ID tokens (JWTs) are verified locally
+    against Google's cached signing certificates. Opaque access tokens are
+    verified with Google's tokeninfo endpoint.
+    
+    Successful verifications are cached in-process until the token expires
+    (at most AUTH_CACHE_TTL seconds, 5 minutes by default), so repeated calls
+    with the same token skip the verification entirely.
     
     Args:
         token: The Bearer token from Authorization header
@@ -77,49 +314,62 @@ def verify_token(token: str) -> dict:
     Raises:
         AuthError: If token is invalid or verification fails
     """
+    cache_key = _token_cache_key(token)
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Use TokenInfo API to verify access token
-        request_adapter = google_requests.Request()
-        
-        # Call Google's tokeninfo endpoint to verify the access token
-        response = request_adapter(
-            url=f'https://oauth2.googleapis.com/tokeninfo?access_token={token}',
-            method='GET'
-        )
-        
-        if response.status != 200:
-            raise ValueError(f"Token verification failed with status {response.status}")
-        
-        import json
-        token_info = json.loads(response.data.decode('utf-8'))
-        
-        # Verify token has not expired
-        if 'error' in token_info:
-            raise ValueError(f"Invalid token: {token_info.get('error_description', 'Unknown error')}")
-        
-        # Check if token has required scope (optional but recommended)
-        scopes = token_info.get('scope', '').split()
-        logger.debug(f"Token scopes: {scopes}")
+        if _AUTH_AUDIENCE and _is_jwt(token):
+            token_info = _verify_id_token(token)
+        else:
+            token_info = _verify_access_token(token)
         
         email = token_info.get('email')
         if not email:
             raise ValueError("Token does not contain email information")
         
-        logger.debug(f"Access token verified for email: {email}")
+        logger.debug("Token verified for email: %s", email)
+        
+        # Only cache tokens that report a future expiry
+        try:
+            expires_in = int(token_info.get('exp', 0)) - time.time()
+        except (TypeError, ValueError):
+            expires_in = 0
+        _token_cache.set(cache_key, token_info, ttl=expires_in)
+        
         return token_info
         
     except ValueError as e:
-        logger.warning(f"Access token verification failed: {e}")
+        logger.warning("Token verification failed: %s", e)
         raise AuthError("Invalid authentication token", 401)
+    except requests.exceptions.RequestException as e:
+        # The exception message embeds the request URL, which carries the token
+        logger.error("Token verification error: %s", type(e).__name__)
+        raise AuthError("Authentication failed", 401)
     except Exception as e:
-        logger.error(f"Access token verification error: {e}")
+        logger.error("Token verification error: %s", e)
         raise AuthError("Authentication failed", 401)
 
 
+def _get_projects_client() -> resourcemanager_v3.ProjectsClient:
+    """Return the process-wide Resource Manager client, creating it on first use."""
+    global _projects_client
+    
+    if _projects_client is None:
+        with _projects_client_lock:
+            if _projects_client is None:
+                _projects_client = resourcemanager_v3.ProjectsClient()
+    return _projects_client
+
+
 def check_cloud_run_invoker_permission(email: str, project_id: str) -> bool:
     """
     Check if user has Cloud Run Invoker permission in the project.
     
+    Results are cached per (email, project) for 60 seconds so bursts of
+    requests from the same caller only cost one IAM call.
+    
     Args:
         email: User's email address
         project_id: GCP project ID
@@ -127,41 +377,99 @@ def check_cloud_run_invoker_permission(email: str, project_id: str) -> bool:
     Returns:
         True if user has permission, False otherwise
     """
-    logger.info(f"Checking IAM permissions for {email} in project {project_id}")
+    cache_key = (email, project_id)
+    cached = _iam_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    logger.info("Checking IAM permissions for %s in project %s", email, project_id)
     try:
         
-        client = resourcemanager_v3.ProjectsClient()
+        client = _get_projects_client()
         
         resource = f"projects/{project_id}"
 
-        logger.info(f"IAM permissions resource: {resource}")
+        logger.debug("IAM permissions resource: %s", resource)
         
         request_obj = iam_policy_pb2.TestIamPermissionsRequest(
             resource=resource,
             permissions=["run.routes.invoke"]
         )
         
-        logger.info(f"IAM permissions request: {request_obj}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("IAM permissions request: %s", request_obj)
         
         response = client.test_iam_permissions(request=request_obj)
 
-        logger.info(f"IAM permissions response: {response}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("IAM permissions response: %s", response)
         
         has_permission = "run.routes.invoke" in response.permissions
         
         if has_permission:
-            logger.info(f"User {email} has Cloud Run Invoker permission")
+            logger.info("User %s has Cloud Run Invoker permission", email)
         else:
-            logger.warning(f"User {email} does NOT have Cloud Run Invoker permission")
-            
+            logger.warning("User %s does NOT have Cloud Run Invoker permission", email)
+        
+        _iam_cache.set(cache_key, has_permission)
         return has_permission
         
     except Exception as e:
-        logger.error("IN here")
-        logger.error(f"Failed to check IAM permissions: {e}")
+        logger.error("Failed to check IAM permissions: %s", e)
         return False
 
 
+def bulk_check_invokers(emails: List[str], project_id: str) -> Dict[str, bool]:
+    """
+    Check Cloud Run Invoker access for many users with a single IAM call.
+    
+    Fetches the project IAM policy once and evaluates membership locally
+    instead of issuing one permission check per user. Direct ``user:`` and
+    ``serviceAccount:`` members and ``domain:`` members are matched.
+    ``group:`` members and conditional bindings cannot be evaluated locally
+    and do not grant access here, nor do custom roles or grants inherited
+    from folders or the organization, so a False result may be a false
+    negative. Only positive results warm the per-user cache used by
+    check_cloud_run_invoker_permission; everyone else is still checked
+    individually on their next request.
+    
+    Args:
+        emails: Email addresses to check
+        project_id: GCP project ID
+        
+    Returns:
+        Mapping of email to whether the user can invoke the service
+    """
+    logger.info("Checking IAM invoker bindings for %s users in project %s", len(emails), project_id)
+    try:
+        policy = _get_projects_client().get_iam_policy(resource=f"projects/{project_id}")
+    except Exception as e:
+        logger.error("Failed to fetch IAM policy: %s", e)
+        return {email: False for email in emails}
+    
+    members = set()
+    for binding in policy.bindings:
+        if binding.role not in _INVOKER_ROLES:
+            continue
+        if binding.condition.expression:
+            continue
+        members.update(binding.members)
+    
+    results = {}
+    for email in emails:
+        domain = email.rpartition('@')[2]
+        has_permission = (
+            f"user:{email}" in members
+            or f"serviceAccount:{email}" in members
+            or f"domain:{domain}" in members
+        )
+        results[email] = has_permission
+        if has_permission:
+            _iam_cache.set((email, project_id), True)
+    
+    return results
+
+
 def extract_token_from_header() -> Optional[str]:
     """
     Extract bearer token from Authorization header.
@@ -169,17 +477,17 @@ def extract_token_from_header() -> Optional[str]:
     Returns:
         The token string or None if not found
     """
-    auth_header = request.headers.get('Authorization', '')
+    auth_header = request.headers.get('Authorization')
     
-    if not auth_header:
+    if not auth_header or len(auth_header) < 8 or auth_header[:7].lower() != 'bearer ':
         return None
     
-    parts = auth_header.split()
+    token = auth_header[7:].strip()
     
-    if len(parts) != 2 or parts[0].lower() != 'bearer':
+    if not token or ' ' in token:
         return None
     
-    return parts[1]
+    return token
 
 
 def require_auth(f):
@@ -189,6 +497,7 @@ def require_auth(f):
     Verifies:
     1. Valid Google Cloud access token is provided
     2. User has Cloud Run Invoker permission in the project
+       (skipped when SKIP_IAM_CHECK=true)
     
     Usage:
         @app.route('/protected')
@@ -196,9 +505,12 @@ def require_auth(f):
         def protected_endpoint():
             return {'message': 'success'}
     """
+    if not AUTH_ENABLED:
+        return f
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        logger.info(f"Decorated function called: {f.__name__}")
+        logger.info("Decorated function called: %s", f.__name__)
         try:
             token = extract_token_from_header()
             
@@ -221,29 +533,32 @@ def require_auth(f):
                     'message': 'Invalid token: email not found'
                 }), 401
             
-            try:
-                project_id = get_project_id()
-            except RuntimeError as e:
-                logger.error(f"Failed to get project ID: {e}")
-                return jsonify({
-                    'status': 'error',
-                    'error': 'configuration_error',
-                    'message': 'Server configuration error: unable to determine GCP project ID'
-                }), 500
+            if SKIP_IAM_CHECK:
+                logger.debug("Skipping IAM permission check (SKIP_IAM_CHECK=true)")
+            else:
+                try:
+                    project_id = get_project_id()
+                except RuntimeError as e:
+                    logger.error("Failed to get project ID: %s", e)
+                    return jsonify({
+                        'status': 'error',
+                        'error': 'configuration_error',
+                        'message': 'Server configuration error: unable to determine GCP project ID'
+                    }), 500
             
-            logger.info(f"Checking IAM permissions for {email} in project {project_id}")
+                logger.info("Checking IAM permissions for %s in project %s", email, project_id)
 
-            has_permission = check_cloud_run_invoker_permission(email, project_id)
+                has_permission = check_cloud_run_invoker_permission(email, project_id)
             
-            if not has_permission:
-                logger.warning(f"Access denied for {email}: insufficient permissions")
-                return jsonify({
-                    'status': 'error',
-                    'error': 'forbidden',
-                    'message': f'Access denied. User {email} does not have Cloud Run Invoker permission in project {project_id}.'
-                }), 403
+                if not has_permission:
+                    logger.warning("Access denied for %s: insufficient permissions", email)
+                    return jsonify({
+                        'status': 'error',
+                        'error': 'forbidden',
+                        'message': f'Access denied. User {email} does not have Cloud Run Invoker permission in project {project_id}.'
+                    }), 403
             
-            logger.info(f"Access granted for {email}")
+            logger.info("Access granted for %s", email)
             
             request.user_email = email
             request.user_info = token_info
@@ -258,7 +573,7 @@ def require_auth(f):
             }), e.status_code
             
         except Exception as e:
-            logger.error(f"Authorization error: {e}", exc_info=True)
+            logger.error("Authorization error: %s", e, exc_info=True)
             return jsonify({
                 'status': 'error',
                 'error': 'authorization_error',
@@ -283,6 +598,9 @@ def optional_auth(f):
             user = getattr(request, 'user_email', None)
             return {'user': user or 'anonymous'}
     """
+    if not AUTH_ENABLED:
+        return f
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
@@ -299,7 +617,7 @@ def optional_auth(f):
             return f(*args, **kwargs)
             
         except Exception as e:
-            logger.warning(f"Optional auth failed: {e}")
+            logger.warning("Optional auth failed: %s", e)
             request.user_email = None
             request.user_info = None
             return f(*args, **kwargs)
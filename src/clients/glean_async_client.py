@@ -0,0 +1,267 @@
+"""Async Glean API Client using HTTP/2 multiplexing for concurrent pushes."""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+import orjson
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
+
+from src.clients.glean_client import BULK_MAX_WORKERS, INDEX_MAX_WORKERS, GleanClient, log_error_response
+from src.clients.http import POOL_MAXSIZE, make_async_httpx_client
+
+
+logger = logging.getLogger(__name__)
+
+
+def _run(coro):
+    """Run a coroutine to completion, on uvloop's faster event loop when installed."""
+    if uvloop is not None:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    return asyncio.run(coro)
+
+
+class GleanAsyncClient(GleanClient):
+    """
+    Glean client that pushes over a single HTTP/2 connection with asyncio.
+
+    Formatting helpers are inherited from GleanClient. ``push_users`` and
+    ``push_teams`` keep their synchronous signatures (they drive the async
+    implementations on a fresh event loop), so this class is a drop-in
+    replacement for GleanClient.
+    """
+
+    def warmup(self) -> None:
+        """
+        Do nothing: there is no long-lived connection to warm.
+
+        Each push opens its own HTTP/2 client on a fresh event loop, so a
+        connection opened ahead of time would never be used for uploads.
+        """
+
+    def _make_async_client(self) -> httpx.AsyncClient:
+        """Create an HTTP/2 client bound to the current event loop."""
+        return make_async_httpx_client(pool=POOL_MAXSIZE, timeout=self.timeout, headers=self._headers)
+
+    async def index_employee_async(self, client: httpx.AsyncClient, employee_data: Dict) -> Dict:
+        """
+        Index a single employee to Glean using the individual index API.
+
+        Args:
+            client: Open async HTTP client
+            employee_data: Formatted employee data
+
+        Returns:
+            Response from Glean API
+        """
+        try:
+            response = await client.post(
+                self._url_index,
+                content=orjson.dumps({"employee": employee_data, "version": 0}),
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error("Failed to index employee %s: %s", employee_data.get('email', 'unknown'), e)
+            if isinstance(e, httpx.HTTPStatusError):
+                log_error_response(e.response)
+            raise
+
+    async def _bulk_index_page_async(self, client: httpx.AsyncClient, employees: List[Dict], **page_flags) -> Dict:
+        """Upload a single page of a bulk employee upload."""
+        payload = self._build_bulk_page_payload(employees, **page_flags)
+        body, headers = self._encode_bulk_body(payload)
+
+        try:
+            response = await client.post(
+                self._url_bulk,
+                headers=headers,
+                content=body,
+            )
+            response.raise_for_status()
+            logger.debug(
+                "Uploaded page of %d employees (upload_id: %s, HTTP %s)",
+                len(employees), page_flags["upload_id"], response.status_code,
+            )
+            return {"uploadId": page_flags["upload_id"], "status": response.status_code}
+        except httpx.HTTPError as e:
+            logger.error("Failed to bulk index employees to Glean: %s", e)
+            if isinstance(e, httpx.HTTPStatusError):
+                log_error_response(e.response)
+            raise
+
+    async def _upload_user_pages_async(self, client: httpx.AsyncClient, pages: Iterable[List[Dict]]) -> int:
+        """
+        Stream pages of formatted users to Glean as one bulk upload.
+
+        Same page ordering as GleanClient.push_user_pages: one page of
+        lookahead, the first page sent on its own, middle pages multiplexed
+        concurrently (at most BULK_MAX_WORKERS in flight), and the last page
+        sent once all others have succeeded. Pages are pulled from ``pages`` in
+        a worker thread, since the stream may block while Keycloak is read.
+
+        Args:
+            client: Open async HTTP client
+            pages: Iterable of formatted employee pages
+
+        Returns:
+            Number of employees uploaded
+        """
+        pages = iter(pages)
+        current = await asyncio.to_thread(next, pages, None)
+        if current is None:
+            return 0
+
+        upload_id = str(uuid.uuid4())
+        total = 0
+        page_count = 0
+
+        async def send(employees: List[Dict], is_first_page: bool, is_last_page: bool) -> None:
+            await self._bulk_index_page_async(
+                client,
+                employees,
+                upload_id=upload_id,
+                is_first_page=is_first_page,
+                is_last_page=is_last_page,
+                disable_stale_data_deletion_check=self.disable_stale_data_deletion,
+            )
+
+        in_flight = deque()
+        try:
+            while True:
+                upcoming = await asyncio.to_thread(next, pages, None)
+                if upcoming is None:
+                    break
+                if page_count == 0:
+                    await send(current, True, False)
+                else:
+                    if len(in_flight) >= BULK_MAX_WORKERS:
+                        await in_flight.popleft()
+                    in_flight.append(asyncio.ensure_future(send(current, False, False)))
+                total += len(current)
+                page_count += 1
+                current = upcoming
+            while in_flight:
+                await in_flight.popleft()
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        await send(current, page_count == 0, True)
+        total += len(current)
+        page_count += 1
+
+        logger.info("Successfully bulk indexed %d employees in %d pages to Glean", total, page_count)
+        return total
+
+    async def push_user_pages_async(self, pages: Iterable[List[Dict]]) -> int:
+        """
+        Stream pages of formatted users to Glean as one bulk upload over HTTP/2.
+
+        Args:
+            pages: Iterable of formatted employee pages
+
+        Returns:
+            Number of employees uploaded
+        """
+        async with self._make_async_client() as client:
+            return await self._upload_user_pages_async(client, pages)
+
+    async def push_users_async(self, users: List[Dict], page_size: Optional[int] = None) -> Dict:
+        """
+        Push users to Glean using either bulk or individual indexing.
+
+        Args:
+            users: List of formatted user data
+            page_size: Employees per bulk upload page (defaults to bulk_page_size)
+
+        Returns:
+            Summary of the upload (with per-user errors for individual indexing)
+        """
+        async with self._make_async_client() as client:
+            if self.use_bulk_index:
+                logger.info("Bulk indexing %d employees to Glean", len(users))
+                total = await self._upload_user_pages_async(client, self._paginate(users, page_size or self.bulk_page_size))
+                return {"total": total}
+
+            logger.info("Individually indexing %s users to Glean", len(users))
+            results = {
+                "total": len(users),
+                "successful": 0,
+                "failed": 0,
+                "errors": []
+            }
+            semaphore = asyncio.Semaphore(INDEX_MAX_WORKERS)
+
+            async def index(user: Dict) -> Dict:
+                async with semaphore:
+                    return await self.index_employee_async(client, user)
+
+            outcomes = await asyncio.gather(*(index(user) for user in users), return_exceptions=True)
+            for user, outcome in zip(users, outcomes):
+                if isinstance(outcome, Exception):
+                    results["failed"] += 1
+                    results["errors"].append({
+                        "email": user.get("email", "unknown"),
+                        "error": str(outcome)
+                    })
+                    logger.warning("Failed to index user %s: %s", user.get('email', 'unknown'), outcome)
+                else:
+                    results["successful"] += 1
+
+            logger.info(
+                "Individual indexing completed: %s successful, %s failed",
+                results["successful"], results["failed"],
+            )
+            return results
+
+    async def push_teams_async(self, teams: List[Dict]) -> Dict:
+        """
+        Push teams/groups to Glean.
+
+        Args:
+            teams: List of formatted team data
+
+        Returns:
+            Response from Glean API
+        """
+        logger.info("Pushing %d teams to Glean", len(teams))
+
+        body, headers = self._encode_bulk_body(self._build_teams_payload(teams))
+
+        async with self._make_async_client() as client:
+            try:
+                response = await client.post(
+                    self._url_teams,
+                    headers=headers,
+                    content=body,
+                )
+                response.raise_for_status()
+                result = response.json()
+                logger.info("Successfully pushed teams to Glean")
+                return result
+            except httpx.HTTPError as e:
+                logger.error("Failed to push teams to Glean: %s", e)
+                if isinstance(e, httpx.HTTPStatusError):
+                    log_error_response(e.response)
+                raise
+
+    def push_users(self, users: List[Dict], page_size: Optional[int] = None) -> Dict:
+        """Synchronous wrapper around push_users_async."""
+        return _run(self.push_users_async(users, page_size))
+
+    def push_user_pages(self, pages: Iterable[List[Dict]]) -> int:
+        """Synchronous wrapper around push_user_pages_async."""
+        return _run(self.push_user_pages_async(pages))
+
+    def push_teams(self, teams: List[Dict]) -> Dict:
+        """Synchronous wrapper around push_teams_async."""
+        return _run(self.push_teams_async(teams))
@@ -0,0 +1,150 @@
+"""Shared HTTP helpers for the API clients."""
+import random
+from itertools import takewhile
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Connections kept per host. Worker counts in the clients must not exceed this,
+# otherwise threads block waiting for a free connection (pool_block=True).
+POOL_MAXSIZE = 32
+
+# (connect, read) timeouts for connection warmup probes
+WARMUP_TIMEOUT = (2, 5)
+
+
+class JitteredRetry(Retry):
+    """
+    urllib3 Retry using "full jitter" exponential backoff.
+
+    Each sleep is drawn uniformly from [0, min(backoff_max, backoff_factor * 2^n)]
+    so that many clients retrying after the same 429/503 spread out instead of
+    hitting the recovering server at the same instants.
+    """
+
+    def get_backoff_time(self) -> float:
+        """Return a random backoff between zero and the exponential cap."""
+        # Only the last run of consecutive errors counts (redirects are ignored)
+        consecutive_errors_len = len(
+            list(takewhile(lambda x: x.redirect_location is None, reversed(self.history)))
+        )
+        if consecutive_errors_len <= 1:
+            return 0
+
+        cap = min(self.backoff_max, self.backoff_factor * (2 ** (consecutive_errors_len - 1)))
+        return random.uniform(0, cap)
+
+
+def build_retry() -> JitteredRetry:
+    """Return the retry policy shared by the API clients."""
+    return JitteredRetry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+    )
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout when none is given."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def build_session(pool: int = POOL_MAXSIZE, timeout: float = 30) -> TimeoutSession:
+    """
+    Create a session with the connection pool and retry policy shared by the API clients.
+
+    Args:
+        pool: Connections kept (and allowed) per host
+        timeout: Default request timeout in seconds
+
+    Returns:
+        Configured session
+    """
+    session = TimeoutSession(timeout)
+    adapter = HTTPAdapter(
+        pool_connections=pool,
+        pool_maxsize=pool,
+        pool_block=True,
+        max_retries=build_retry(),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def warm_connection(session: requests.Session, url: str) -> None:
+    """
+    Open a keep-alive connection in the session's pool with a single HEAD request.
+
+    The probe is sent through an adapter that shares the session adapter's
+    connection pool but never retries, with short timeouts, so an unreachable
+    host costs at most one connect timeout instead of the full retry policy.
+
+    Only requests sessions are warmed; the httpx HTTP/2 clients are created
+    per push, so there is nothing long-lived to warm for them.
+
+    Args:
+        session: Session whose pool should hold the connection
+        url: URL on the host to connect to
+
+    Raises:
+        requests.exceptions.RequestException: If the probe fails
+    """
+    adapter = session.get_adapter(url)
+    probe = HTTPAdapter(max_retries=0)
+    probe.poolmanager = adapter.poolmanager
+    request = session.prepare_request(requests.Request("HEAD", url))
+    # Same verify/cert/proxies as a real request, so the connection lands in the same pool
+    settings = session.merge_environment_settings(request.url, {}, None, None, None)
+    response = probe.send(
+        request,
+        timeout=WARMUP_TIMEOUT,
+        verify=settings["verify"],
+        cert=settings["cert"],
+        proxies=settings["proxies"],
+    )
+    # Reading the (empty) body returns the connection to the pool
+    response.content
+
+
+def make_async_httpx_client(
+    pool: int = POOL_MAXSIZE,
+    timeout: float = 30,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.AsyncClient:
+    """
+    Create an HTTP/2 async client sized like the requests sessions.
+
+    Requests to one host are multiplexed over a single HTTP/2 connection where
+    the server supports it; the pool bounds connections when it does not.
+
+    Args:
+        pool: Maximum (and keep-alive) connections
+        timeout: Default request timeout in seconds
+        headers: Default request headers
+
+    Returns:
+        Configured async client (must be used within one event loop)
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        timeout=timeout,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=pool, max_keepalive_connections=pool),
+        ),
+    )
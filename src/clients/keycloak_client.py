@@ -1,13 +1,18 @@
 """Keycloak API Client for fetching user and group data."""
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from src.clients.http import POOL_MAXSIZE, build_session, warm_connection
 
 
 logger = logging.getLogger(__name__)
 
+# Refresh the access token this many seconds before Keycloak says it expires
+TOKEN_EXPIRY_MARGIN = 30
+
 
 class KeycloakClient:
     """Client for interacting with Keycloak Admin API."""
@@ -36,16 +41,18 @@ class KeycloakClient:
         self.client_secret = client_secret
         self.timeout = timeout
         self.access_token: Optional[str] = None
+        self._headers: Optional[Dict[str, str]] = None
+        self._token_expiry = 0.0
+        self._auth_lock = threading.Lock()
+
+        self.session = build_session(pool=POOL_MAXSIZE, timeout=timeout)
 
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+    def warmup(self) -> None:
+        """Open a keep-alive connection to Keycloak so the first real request skips the TLS handshake."""
+        try:
+            warm_connection(self.session, self.base_url)
+        except requests.exceptions.RequestException as e:
+            logger.debug("Keycloak connection warmup failed: %s", e)
 
     def _get_token_url(self) -> str:
         """Get the token endpoint URL."""
@@ -72,90 +79,143 @@ class KeycloakClient:
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            self.access_token = response.json()["access_token"]
+            token = response.json()
+            self.access_token = token["access_token"]
+            self._token_expiry = time.monotonic() + token.get("expires_in", 60) - TOKEN_EXPIRY_MARGIN
+            self._headers = {
+                "Authorization": f"Bearer {self.access_token}",
+                "Content-Type": "application/json",
+            }
             logger.info("Successfully authenticated with Keycloak")
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to authenticate with Keycloak: {e}")
             raise
 
     def _get_headers(self) -> Dict[str, str]:
-        """Get headers with authorization token."""
-        if not self.access_token:
-            self.authenticate()
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
+        """Get headers with authorization token, re-authenticating shortly before it expires."""
+        if self._headers is None or time.monotonic() >= self._token_expiry:
+            with self._auth_lock:
+                if self._headers is None or time.monotonic() >= self._token_expiry:
+                    self.authenticate()
+        return self._headers
+
+    def ensure_authenticated(self) -> None:
+        """Authenticate unless a cached, unexpired access token is available."""
+        self._get_headers()
+
+    def _admin_get(self, path: str, params: Optional[Dict] = None) -> requests.Response:
+        """
+        GET an admin API path, re-authenticating once if the token was rejected.
 
-    def get_users(self, max_users: Optional[int] = None) -> List[Dict]:
+        Covers a token that expired (or was revoked) between the expiry check
+        and the request; other error statuses are left to the caller.
         """
-        Fetch all users from Keycloak.
+        url = f"{self._get_admin_url()}{path}"
+        headers = self._get_headers()
+        response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+        if response.status_code == 401:
+            logger.info("Keycloak rejected the access token, re-authenticating")
+            with self._auth_lock:
+                if self._headers is headers:
+                    self.authenticate()
+            response = self.session.get(url, headers=self._get_headers(), params=params, timeout=self.timeout)
+        return response
+
+    def iter_user_batches(self, batch_size: int = 100, max_users: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Lazily fetch users from Keycloak one page at a time.
 
         Args:
-            max_users: Maximum number of users to fetch (None for all)
+            batch_size: Number of users requested per page
+            max_users: Maximum number of users to yield (None for all)
 
-        Returns:
-            List of user dictionaries
+        Yields:
+            Lists of user dictionaries, one per Keycloak page
         """
         logger.info("Fetching users from Keycloak")
-        users = []
         first = 0
-        batch_size = 100
+        fetched = 0
 
         try:
             while True:
                 params = {"first": first, "max": batch_size}
-                response = self.session.get(
-                    f"{self._get_admin_url()}/users",
-                    headers=self._get_headers(),
-                    params=params,
-                    timeout=self.timeout,
-                )
+                response = self._admin_get("/users", params=params)
                 response.raise_for_status()
                 batch = response.json()
 
                 if not batch:
                     break
 
-                users.extend(batch)
-                logger.debug(f"Fetched {len(batch)} users (total: {len(users)})")
-
-                if max_users and len(users) >= max_users:
-                    users = users[:max_users]
+                if max_users and fetched + len(batch) >= max_users:
+                    batch = batch[:max_users - fetched]
+                    fetched += len(batch)
+                    logger.debug("Fetched %d users (total: %d)", len(batch), fetched)
+                    yield batch
                     break
 
+                fetched += len(batch)
+                logger.debug("Fetched %d users (total: %d)", len(batch), fetched)
+                yield batch
+
                 if len(batch) < batch_size:
                     break
 
                 first += batch_size
 
-            logger.info(f"Successfully fetched {len(users)} users")
-            return users
+            logger.info("Successfully fetched %d users", fetched)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch users: {e}")
             raise
 
-    def get_user_groups(self, user_id: str) -> List[Dict]:
+    def get_users(self, max_users: Optional[int] = None) -> List[Dict]:
         """
-        Fetch groups for a specific user.
+        Fetch all users from Keycloak.
 
         Args:
-            user_id: User ID
+            max_users: Maximum number of users to fetch (None for all)
 
         Returns:
-            List of group dictionaries
+            List of user dictionaries
+        """
+        users = []
+        for batch in self.iter_user_batches(max_users=max_users):
+            users.extend(batch)
+        return users
+
+    def get_group_members(self, group_id: str, batch_size: int = 500) -> List[Dict]:
         """
+        Fetch all members of a group.
+
+        Members are requested in brief representation, which still carries
+        each user's id, username and email.
+
+        Args:
+            group_id: Group ID
+            batch_size: Number of members requested per page
+
+        Returns:
+            List of user dictionaries
+        """
+        members = []
+        first = 0
+
         try:
-            response = self.session.get(
-                f"{self._get_admin_url()}/users/{user_id}/groups",
-                headers=self._get_headers(),
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            return response.json()
+            while True:
+                params = {"first": first, "max": batch_size, "briefRepresentation": "true"}
+                response = self._admin_get(f"/groups/{group_id}/members", params=params)
+                response.raise_for_status()
+                batch = response.json()
+                members.extend(batch)
+
+                if len(batch) < batch_size:
+                    break
+
+                first += batch_size
+
+            return members
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch groups for user {user_id}: {e}")
+            logger.error(f"Failed to fetch members for group {group_id}: {e}")
             raise
 
     def get_groups(self) -> List[Dict]:
@@ -168,11 +228,7 @@ class KeycloakClient:
         logger.info("Fetching groups from Keycloak")
         
         try:
-            response = self.session.get(
-                f"{self._get_admin_url()}/groups",
-                headers=self._get_headers(),
-                timeout=self.timeout,
-            )
+            response = self._admin_get("/groups")
             response.raise_for_status()
             groups = response.json()
             logger.info(f"Successfully fetched {len(groups)} groups")
@@ -23,14 +23,19 @@ class GleanConfig:
     timeout: int = 30
     use_bulk_index: bool = True
     disable_stale_data_deletion: bool = False
+    use_http2: bool = False
+    bulk_page_size: int = 1000
+    compress: bool = False
 
 
 @dataclass
 class AppConfig:
     """Application configuration."""
     log_level: str = "INFO"
+    log_format: str = "text"
     dry_run: bool = False
     max_users: Optional[int] = None
+    profile: bool = False
 
 
 class Settings:
@@ -77,6 +82,11 @@ class Settings:
 
         use_bulk_index = os.getenv("GLEAN_USE_BULK_INDEX", "true").lower() in ("true", "1", "yes")
         disable_stale_data_deletion = os.getenv("GLEAN_DISABLE_STALE_DATA_DELETION", "false").lower() in ("true", "1", "yes")
+        use_http2 = os.getenv("GLEAN_USE_HTTP2", "false").lower() in ("true", "1", "yes")
+        compress = os.getenv("GLEAN_COMPRESS", "false").lower() in ("true", "1", "yes")
+        bulk_page_size = int(os.getenv("GLEAN_BULK_PAGE_SIZE", "1000"))
+        if bulk_page_size <= 0:
+            raise ValueError(f"GLEAN_BULK_PAGE_SIZE must be a positive integer, got {bulk_page_size}")
 
         return GleanConfig(
             api_url=os.getenv("GLEAN_API_URL"),
@@ -85,6 +95,9 @@ class Settings:
             timeout=int(os.getenv("GLEAN_TIMEOUT", "30")),
             use_bulk_index=use_bulk_index,
             disable_stale_data_deletion=disable_stale_data_deletion,
+            use_http2=use_http2,
+            bulk_page_size=bulk_page_size,
+            compress=compress,
         )
 
     def _load_app_config(self) -> AppConfig:
@@ -92,11 +105,14 @@ class Settings:
         dry_run = os.getenv("DRY_RUN", "false").lower() in ("true", "1", "yes")
         max_users_str = os.getenv("MAX_USERS")
         max_users = int(max_users_str) if max_users_str else None
+        profile = os.getenv("PROFILE", "false").lower() in ("true", "1", "yes")
 
         return AppConfig(
             log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            log_format=os.getenv("LOG_FORMAT", "text").lower(),
             dry_run=dry_run,
             max_users=max_users,
+            profile=profile,
         )
 
 
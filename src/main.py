@@ -1,15 +1,35 @@
 """Main orchestration script for syncing Keycloak data to Glean."""
 import logging
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full, Queue
+from typing import Dict, Iterator, List
 
 from src.clients.keycloak_client import KeycloakClient
 from src.clients.glean_client import GleanClient
+from src.clients.glean_async_client import GleanAsyncClient
 from src.config.settings import load_settings
-from src.utils.logger import setup_logging
+from src.utils.logger import TracebackSampler, setup_logging, stack_hash
 
 
 logger = logging.getLogger(__name__)
 
+# Concurrent Keycloak requests when fetching group members
+GROUP_FETCH_MAX_WORKERS = 8
+
+# Formatted user pages buffered between the Keycloak reader and the Glean upload
+USER_PAGE_QUEUE_SIZE = 4
+
+# cProfile output written when PROFILE is enabled
+PROFILE_OUTPUT = "people_export.prof"
+
+_traceback_sampler = TracebackSampler()
+
+
+class SyncError(Exception):
+    """Raised when a sync run fails (the cause is logged and chained)."""
+
 
 class PeopleDataExporter:
     """Orchestrates data export from Keycloak to Glean."""
@@ -17,7 +37,7 @@ class PeopleDataExporter:
     def __init__(self):
         """Initialize the exporter with configuration."""
         self.settings = load_settings()
-        setup_logging(self.settings.app.log_level)
+        setup_logging(self.settings.app.log_level, self.settings.app.log_format)
         
         self.keycloak_client = KeycloakClient(
             base_url=self.settings.keycloak.base_url,
@@ -27,24 +47,38 @@ class PeopleDataExporter:
             timeout=self.settings.keycloak.timeout,
         )
         
-        self.glean_client = GleanClient(
+        glean_client_cls = GleanAsyncClient if self.settings.glean.use_http2 else GleanClient
+        self.glean_client = glean_client_cls(
             api_url=self.settings.glean.api_url,
             api_token=self.settings.glean.api_token,
             datasource=self.settings.glean.datasource,
             timeout=self.settings.glean.timeout,
             use_bulk_index=self.settings.glean.use_bulk_index,
             disable_stale_data_deletion=self.settings.glean.disable_stale_data_deletion,
+            bulk_page_size=self.settings.glean.bulk_page_size,
+            compress=self.settings.glean.compress,
         )
 
     def sync_users(self) -> int:
         """
         Fetch users from Keycloak and push to Glean.
 
+        In bulk mode users are streamed: Keycloak pages are formatted and
+        pushed to Glean as they arrive instead of being collected first.
+
         Returns:
             Number of users synced
         """
         logger.info("Starting user sync")
         
+        if self.settings.glean.use_bulk_index and not self.settings.app.dry_run:
+            synced = self.glean_client.push_user_pages(self._stream_user_pages())
+            if not synced:
+                logger.warning("No users found in Keycloak")
+                return 0
+            logger.info(f"Successfully synced {synced} users")
+            return synced
+
         users = self.keycloak_client.get_users(
             max_users=self.settings.app.max_users
         )
@@ -53,10 +87,7 @@ class PeopleDataExporter:
             logger.warning("No users found in Keycloak")
             return 0
 
-        glean_users = [
-            self.glean_client.format_user_for_glean(user)
-            for user in users
-        ]
+        glean_users = self.glean_client.format_users_for_glean(users)
 
         if self.settings.app.dry_run:
             logger.info(f"DRY RUN: Would push {len(glean_users)} users to Glean")
@@ -67,6 +98,59 @@ class PeopleDataExporter:
         logger.info(f"Successfully synced {len(glean_users)} users")
         return len(glean_users)
 
+    def _stream_user_pages(self) -> Iterator[List[Dict]]:
+        """
+        Yield Glean-formatted bulk upload pages while Keycloak is still being read.
+
+        A producer thread fetches and formats Keycloak pages into chunks of
+        ``bulk_page_size`` and hands them over through a bounded queue, so at
+        most USER_PAGE_QUEUE_SIZE pages are buffered at any time. Errors raised
+        by the producer are re-raised in the consuming thread.
+        """
+        page_size = self.settings.glean.bulk_page_size
+        pages: Queue = Queue(maxsize=USER_PAGE_QUEUE_SIZE)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                page = []
+                for batch in self.keycloak_client.iter_user_batches(max_users=self.settings.app.max_users):
+                    page.extend(self.glean_client.format_users_for_glean(batch))
+                    while len(page) >= page_size:
+                        if not put(page[:page_size]):
+                            return
+                        page = page[page_size:]
+                if page:
+                    put(page)
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        producer = threading.Thread(target=produce, name="keycloak-user-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+
     def sync_groups(self) -> int:
         """
         Fetch groups from Keycloak and push to Glean as teams.
@@ -76,31 +160,26 @@ class PeopleDataExporter:
         """
         logger.info("Starting groups sync")
         
-        groups = self.keycloak_client.get_groups()
+        groups = [group for group in self.keycloak_client.get_groups() if group.get("id")]
         
         if not groups:
             logger.warning("No groups found in Keycloak")
             return 0
 
-        users = self.keycloak_client.get_users()
-        user_email_map = {
-            user["id"]: user.get("email", "")
-            for user in users
-            if user.get("email")
-        }
+        with ThreadPoolExecutor(max_workers=GROUP_FETCH_MAX_WORKERS) as executor:
+            member_futures = [
+                executor.submit(self.keycloak_client.get_group_members, group["id"])
+                for group in groups
+            ]
 
         glean_teams = []
-        for group in groups:
-            group_id = group.get("id")
-            if not group_id:
-                continue
-
+        for group, members_future in zip(groups, member_futures):
             try:
-                members = self.keycloak_client.get_user_groups(group_id)
+                members = members_future.result()
                 member_emails = [
-                    user_email_map.get(member["id"])
+                    member["email"]
                     for member in members
-                    if member.get("id") in user_email_map
+                    if member.get("email")
                 ]
                 
                 team = self.glean_client.format_group_for_glean(
@@ -125,14 +204,23 @@ class PeopleDataExporter:
         return len(glean_teams)
 
     def run(self) -> None:
-        """Run the complete sync process."""
+        """
+        Run the complete sync process.
+
+        The exporter (and its warm HTTP connections) can be reused for further
+        runs; call close() when it is no longer needed.
+
+        Raises:
+            SyncError: If the sync fails
+        """
         logger.info("=" * 60)
         logger.info("People Data Exporter - Starting sync")
         logger.info(f"Indexing mode: {'BULK' if self.settings.glean.use_bulk_index else 'INDIVIDUAL'}")
         logger.info("=" * 60)
         
         try:
-            self.keycloak_client.authenticate()
+            # Reuses the token from a previous run on this exporter while still valid
+            self.keycloak_client.ensure_authenticated()
             
             users_synced = self.sync_users()
             # groups_synced = self.sync_groups()
@@ -144,18 +232,61 @@ class PeopleDataExporter:
             logger.info("=" * 60)
             
         except Exception as e:
-            logger.error(f"Sync failed: {e}", exc_info=True)
-            sys.exit(1)
-        finally:
-            self.keycloak_client.close()
-            self.glean_client.close()
+            logger.error(
+                "Sync failed: %s (type=%s hash=%s)", e, type(e).__name__, stack_hash(e),
+                exc_info=_traceback_sampler.should_sample(),
+            )
+            raise SyncError(str(e)) from e
+
+    def warmup(self) -> None:
+        """
+        Open keep-alive connections to Keycloak and Glean ahead of the first sync.
+
+        Best effort: failures are logged at debug level and the sync connects normally.
+        With GLEAN_USE_HTTP2 only Keycloak is warmed (see GleanAsyncClient.warmup).
+        """
+        self.keycloak_client.warmup()
+        self.glean_client.warmup()
+
+    def close(self) -> None:
+        """Close the API clients and their connection pools."""
+        self.keycloak_client.close()
+        self.glean_client.close()
+
+
+def run_profiled(exporter: PeopleDataExporter) -> None:
+    """
+    Run the sync under cProfile and write the stats to PROFILE_OUTPUT.
+
+    Only the main thread is profiled; time spent in upload and fetch worker
+    threads shows up as waits on their futures and queues.
+    """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        exporter.run()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(PROFILE_OUTPUT)
+        logger.info(f"Profile written to {PROFILE_OUTPUT} (view with: snakeviz {PROFILE_OUTPUT})")
 
 
 def main():
     """Entry point for the application."""
     try:
         exporter = PeopleDataExporter()
-        exporter.run()
+        try:
+            if exporter.settings.app.profile:
+                run_profiled(exporter)
+            else:
+                exporter.run()
+        finally:
+            exporter.close()
+    except SyncError:
+        # Already logged by PeopleDataExporter.run()
+        sys.exit(1)
     except ValueError as e:
         logger.error(f"Configuration error: {e}")
         sys.exit(1)
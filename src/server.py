@@ -1,16 +1,154 @@
 """HTTP server for Cloud Run deployment."""
+import gc
 import logging
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Dict, Optional
+import orjson
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
 from flask import Flask, jsonify, request
 from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-from src.main import PeopleDataExporter
-from src.auth import require_auth, optional_auth
+from src.main import PeopleDataExporter, SyncError
+from src.auth import init_auth_module, require_auth, optional_auth
+from src.utils.json_provider import OrjsonProvider
+from src.utils.logger import TracebackSampler, stack_hash
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 logger = logging.getLogger(__name__)
 
+# Number of sync job records kept for status lookups
+SYNC_JOB_HISTORY = 100
+
+# Generational GC thresholds for the long-lived server process; a higher
+# generation-0 threshold means far fewer collections under steady load
+GC_THRESHOLD = (50000, 10, 10)
+
+# Syncs run one at a time on a background thread; later requests queue behind it
+_sync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sync')
+_sync_jobs: Dict[str, Dict] = {}
+_sync_jobs_lock = threading.Lock()
+
+# Exporter shared by all syncs in this process, so its HTTP connection pools
+# stay warm between runs. Runs are serialized because they share its clients.
+_exporter: Optional[PeopleDataExporter] = None
+_exporter_lock = threading.Lock()
+_sync_run_lock = threading.Lock()
+
+_traceback_sampler = TracebackSampler()
+
+# Prometheus metrics (per process; the default registry also exports process_* metrics)
+SYNC_TOTAL = Counter('sync', 'Completed sync runs', ['status'])
+SYNC_DURATION = Histogram(
+    'sync_duration_seconds',
+    'Sync run duration in seconds',
+    buckets=(30, 60, 120, 300, 600, 900, 1800, 3600),
+)
+
+# Constant response bodies, encoded once at import
+_ROOT_BODY = orjson.dumps({
+    'service': 'people-data-exporter',
+    'version': '1.0.0',
+    'endpoints': {
+        'health': '/health',
+        'sync': '/sync (POST)',
+        'sync_status': '/sync/<job_id> (GET)',
+        'metrics': '/metrics'
+    }
+})
+_HEALTH_BODY_PREFIX = b'{"status":"healthy","service":"people-data-exporter","timestamp":"'
+_HEALTH_BODY_SUFFIX = b'"}'
+
+
+def _health_body(timestamp: str) -> bytes:
+    """Splice the timestamp into the pre-encoded unauthenticated /health body."""
+    return _HEALTH_BODY_PREFIX + timestamp.encode() + _HEALTH_BODY_SUFFIX
+
+
+def _static_fast_path(wsgi_app):
+    """
+    WSGI middleware answering the constant GET endpoints without entering Flask.
+
+    GET / and unauthenticated GET /health (health probes) skip routing,
+    request context setup and signal dispatch. /health requests with a token
+    still go through the Flask route so optional_auth can report the
+    authenticated user.
+    """
+    root_headers = [
+        ('Content-Type', 'application/json'),
+        ('Content-Length', str(len(_ROOT_BODY))),
+    ]
+    
+    def middleware(environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'GET':
+            path = environ.get('PATH_INFO')
+            if path == '/':
+                start_response('200 OK', root_headers)
+                return [_ROOT_BODY]
+            if path == '/health' and 'HTTP_AUTHORIZATION' not in environ:
+                body = _health_body(datetime.utcnow().isoformat())
+                start_response('200 OK', [
+                    ('Content-Type', 'application/json'),
+                    ('Content-Length', str(len(body))),
+                ])
+                return [body]
+        return wsgi_app(environ, start_response)
+    
+    return middleware
+
+
+# Cloud Run's front end appends one X-Forwarded-For / X-Forwarded-Proto hop
+app.wsgi_app = _static_fast_path(ProxyFix(app.wsgi_app, x_for=1, x_proto=1))
+
+init_auth_module()
+
+
+def get_exporter() -> PeopleDataExporter:
+    """
+    Get the process-wide exporter, creating it on first use.
+
+    Returns:
+        The shared PeopleDataExporter
+
+    Raises:
+        ValueError: If the configuration is invalid (retried on the next call)
+    """
+    global _exporter
+    
+    if _exporter is not None:
+        return _exporter
+    
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = PeopleDataExporter()
+        return _exporter
+
+
+def warmup_exporter() -> None:
+    """
+    Warm the shared exporter's connection pools.
+
+    Must run in the process that serves requests (for gunicorn, after the
+    worker has forked) so pooled sockets are never shared between processes.
+    """
+    try:
+        get_exporter().warmup()
+    except Exception as e:
+        logger.warning("Skipping exporter warmup: %s", e)
+
+
+try:
+    get_exporter()
+except Exception as e:
+    logger.warning("Deferring exporter initialization: %s", e)
+
 
 @app.route('/health', methods=['GET'])
 @optional_auth
@@ -22,17 +160,101 @@ def health_check():
     Authentication is optional for this endpoint.
     """
     user = getattr(request, 'user_email', None)
-    
-    response = {
-        'status': 'healthy',
-        'service': 'people-data-exporter',
-        'timestamp': datetime.utcnow().isoformat()
-    }
+    timestamp = datetime.utcnow().isoformat()
     
     if user:
-        response['authenticated_user'] = user
+        return jsonify({
+            'status': 'healthy',
+            'service': 'people-data-exporter',
+            'timestamp': timestamp,
+            'authenticated_user': user
+        }), 200
     
-    return jsonify(response), 200
+    # Unauthenticated probes normally never get here (see _static_fast_path)
+    return app.response_class(_health_body(timestamp), status=200, mimetype='application/json')
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Disable the cyclic garbage collector for the duration of a sync.
+
+    A sync allocates many short-lived records and payloads, which are freed by
+    reference counting; the collector would only repeatedly scan them. Garbage
+    from before the sync is collected up front and any cycles left by the sync
+    are collected once at the end. Syncs are serialized by _sync_run_lock, so
+    pauses never overlap.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+        gc.collect()
+
+
+def _execute_sync(job: Dict) -> None:
+    """
+    Run a full sync, recording its outcome in the job record.
+
+    Args:
+        job: Job record; start/end times, duration, status and any error are filled in
+    """
+    # Queued behind another sync until the lock is free; only then is the job running
+    with _sync_run_lock:
+        job['status'] = 'running'
+        job['start_time'] = datetime.utcnow().isoformat()
+        started = time.perf_counter()
+        
+        try:
+            exporter = get_exporter()
+            with _gc_paused():
+                exporter.run()
+            job['status'] = 'success'
+            job['message'] = 'Data sync completed successfully'
+        except ValueError as e:
+            logger.error("Configuration error: %s", e)
+            job.update(status='error', error_type='configuration_error', message=str(e))
+        except SyncError as e:
+            # Already logged by PeopleDataExporter.run()
+            job.update(status='error', error_type='sync_error', message=str(e))
+        except Exception as e:
+            logger.error(
+                "Sync failed: %s (type=%s hash=%s)", e, type(e).__name__, stack_hash(e),
+                exc_info=_traceback_sampler.should_sample(),
+            )
+            job.update(status='error', error_type='sync_error', message=str(e))
+        finally:
+            job['duration_seconds'] = time.perf_counter() - started
+            job['end_time'] = datetime.utcnow().isoformat()
+            SYNC_TOTAL.labels(status=job['status']).inc()
+            SYNC_DURATION.observe(job['duration_seconds'])
+
+
+def _run_sync_job(job_id: str) -> None:
+    """Run a queued sync job on the background executor."""
+    _execute_sync(_sync_jobs[job_id])
+    logger.info("Sync job %s finished with status: %s", job_id, _sync_jobs[job_id]['status'])
+
+
+def _register_job(user_email: str) -> Dict:
+    """Create a queued job record, forgetting the oldest finished jobs beyond SYNC_JOB_HISTORY."""
+    job = {
+        'job_id': uuid.uuid4().hex,
+        'status': 'queued',
+        'triggered_by': user_email,
+        'submitted_at': datetime.utcnow().isoformat(),
+    }
+    with _sync_jobs_lock:
+        _sync_jobs[job['job_id']] = job
+        finished = [
+            job_id for job_id, record in _sync_jobs.items()
+            if record['status'] in ('success', 'error')
+        ]
+        for job_id in finished[:max(0, len(_sync_jobs) - SYNC_JOB_HISTORY)]:
+            del _sync_jobs[job_id]
+    return job
 
 
 @app.route('/sync', methods=['POST'])
@@ -43,63 +265,96 @@ def trigger_sync():
     
     Requires authentication and Cloud Run Invoker permission.
     
+    By default the sync is queued on a background worker and the job can be
+    polled at /sync/<job_id>. Pass ?wait=true to run it within the request
+    instead (used by Cloud Scheduler, so Cloud Run keeps the instance busy).
+    
     Returns:
-        200: Sync completed successfully
+        200: Sync completed successfully (wait=true)
+        202: Sync accepted and queued
         401: Unauthorized (invalid or missing token)
         403: Forbidden (insufficient permissions)
-        500: Sync failed
+        500: Sync failed (wait=true)
     """
-    start_time = datetime.utcnow()
     user_email = getattr(request, 'user_email', 'unknown')
+    wait = request.args.get('wait', 'false').lower() in ('true', '1', 'yes')
     
-    logger.info(f"Sync triggered via HTTP endpoint by user: {user_email}")
+    logger.info("Sync triggered via HTTP endpoint by user: %s", user_email)
     
-    try:
-        exporter = PeopleDataExporter()
-        exporter.run()
-        
-        end_time = datetime.utcnow()
-        duration = (end_time - start_time).total_seconds()
-        
+    job = _register_job(user_email)
+    
+    if not wait:
+        _sync_executor.submit(_run_sync_job, job['job_id'])
+        return jsonify({
+            'status': 'accepted',
+            'job_id': job['job_id'],
+            'status_url': f"/sync/{job['job_id']}",
+            'triggered_by': user_email,
+            'submitted_at': job['submitted_at']
+        }), 202
+    
+    _execute_sync(job)
+    
+    if job['status'] == 'success':
         return jsonify({
             'status': 'success',
-            'message': 'Data sync completed successfully',
+            'message': job['message'],
+            'job_id': job['job_id'],
             'triggered_by': user_email,
-            'start_time': start_time.isoformat(),
-            'end_time': end_time.isoformat(),
-            'duration_seconds': duration
+            'start_time': job['start_time'],
+            'end_time': job['end_time'],
+            'duration_seconds': job['duration_seconds']
         }), 200
-        
-    except ValueError as e:
-        logger.error(f"Configuration error: {e}")
-        return jsonify({
-            'status': 'error',
-            'error_type': 'configuration_error',
-            'message': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
-        
-    except Exception as e:
-        logger.error(f"Sync failed: {e}", exc_info=True)
+    
+    return jsonify({
+        'status': 'error',
+        'error_type': job['error_type'],
+        'message': job['message'],
+        'job_id': job['job_id'],
+        'timestamp': job['end_time']
+    }), 500
+
+
+@app.route('/sync/<job_id>', methods=['GET'])
+@require_auth
+def sync_status(job_id):
+    """
+    Get the status of a sync job.
+    
+    Job records are kept in memory by the worker process that accepted the
+    job, for the most recent SYNC_JOB_HISTORY jobs.
+    
+    Returns:
+        200: Job record (status is queued, running, success or error)
+        404: Unknown job ID
+    """
+    job = _sync_jobs.get(job_id)
+    if job is None:
         return jsonify({
             'status': 'error',
-            'error_type': 'sync_error',
-            'message': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+            'error': 'Not Found',
+            'message': f'Unknown sync job: {job_id}'
+        }), 404
+    
+    return jsonify(dict(job)), 200
 
 
 @app.route('/', methods=['GET'])
 def root():
-    """Root endpoint with service information."""
-    return jsonify({
-        'service': 'people-data-exporter',
-        'version': '1.0.0',
-        'endpoints': {
-            'health': '/health',
-            'sync': '/sync (POST)'
-        }
-    }), 200
+    """Root endpoint with service information (normally served by _static_fast_path)."""
+    return app.response_class(_ROOT_BODY, status=200, mimetype='application/json')
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics endpoint.
+    
+    Exposes sync_total (by status), sync_duration_seconds and the default
+    process metrics in the Prometheus text format. Not authenticated, like
+    /health; Cloud Run's IAM gate still applies to external callers.
+    """
+    return app.response_class(generate_latest(), status=200, mimetype=None, content_type=CONTENT_TYPE_LATEST)
 
 
 @app.errorhandler(HTTPException)
@@ -115,7 +370,10 @@ def handle_http_exception(e):
 @app.errorhandler(Exception)
 def handle_exception(e):
     """Handle unexpected exceptions."""
-    logger.error(f"Unexpected error: {e}", exc_info=True)
+    logger.error(
+        "Unexpected error: %s (type=%s hash=%s)", e, type(e).__name__, stack_hash(e),
+        exc_info=_traceback_sampler.should_sample(),
+    )
     return jsonify({
         'status': 'error',
         'error': 'internal_server_error',
@@ -124,10 +382,13 @@ def handle_exception(e):
 
 
 def main():
-    """Start the HTTP server."""
+    """Start the development HTTP server (production uses gunicorn, see gunicorn_conf.py)."""
     port = int(os.environ.get('PORT', 8080))
     
-    logger.info(f"Starting HTTP server on port {port}")
+    logger.info("Starting HTTP server on port %s", port)
+    
+    gc.set_threshold(*GC_THRESHOLD)
+    warmup_exporter()
     
     app.run(
         host='0.0.0.0',
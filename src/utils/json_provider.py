@@ -0,0 +1,34 @@
+"""orjson-backed JSON provider for the Flask app."""
+from typing import Any, Union
+
+import orjson
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+
+# Naive datetimes are UTC in this service (datetime.utcnow())
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Serialize Flask JSON (``jsonify``, ``request.get_json``) with orjson.
+
+    Types orjson does not handle natively fall back to Flask's default
+    conversions (e.g. Decimal, objects with ``__html__``).
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string."""
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=_ORJSON_OPTIONS).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize data from a JSON string or bytes."""
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """Build a JSON response directly from orjson's bytes output."""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=DefaultJSONProvider.default, option=_ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
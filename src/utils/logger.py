@@ -1,21 +1,116 @@
 """Logging configuration."""
+import itertools
 import logging
 import sys
+import zlib
+from datetime import datetime, timezone
 
+import orjson
 
-def setup_logging(log_level: str = "INFO") -> None:
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Errors logged with a full traceback: one in every N (see TracebackSampler)
+TRACEBACK_SAMPLE_EVERY = 10
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects with orjson.
+
+    Uses the field names Cloud Logging recognizes (``severity``, ``message``,
+    ``time``), so entries are parsed as structured logs. The exception type
+    and traceback are included when the record carries exception info.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize the record as a JSON line."""
+        entry = {
+            "severity": record.levelname,
+            "message": record.getMessage(),
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc),
+            "logger": record.name,
+        }
+        # exc_info is (None, None, None) when logged outside an except block
+        if record.exc_info and record.exc_info[0] is not None:
+            entry["exc_type"] = record.exc_info[0].__name__
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["stack_trace"] = record.exc_text
+        return orjson.dumps(entry, option=orjson.OPT_UTC_Z).decode()
+
+
+class TracebackSampler:
+    """
+    Decide which errors are logged with a full traceback.
+
+    Formatting a traceback walks every frame in Python, which adds up when the
+    same failure repeats (e.g. a degraded downstream API). The first error and
+    then one in every ``every`` get ``exc_info``; the rest are logged with
+    ``stack_hash`` so they can be matched to a sampled traceback.
+    """
+
+    def __init__(self, every: int = TRACEBACK_SAMPLE_EVERY):
+        """
+        Initialize the sampler.
+
+        Args:
+            every: Log a full traceback for one in every N errors
+        """
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def should_sample(self) -> bool:
+        """Return True if the current error should be logged with its traceback."""
+        return next(self._counter) % self.every == 0
+
+
+def stack_hash(exc: BaseException) -> str:
+    """
+    Return a short, stable fingerprint of where an exception was raised.
+
+    Built from the exception type and the file/line of each traceback frame,
+    so repeats of the same failure share a hash across processes.
+
+    Args:
+        exc: Exception with its traceback attached
+
+    Returns:
+        8-character hex digest
+    """
+    parts = [type(exc).__qualname__]
+    tb = exc.__traceback__
+    while tb is not None:
+        parts.append(f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}")
+        tb = tb.tb_next
+    return f"{zlib.crc32('|'.join(parts).encode()):08x}"
+
+
+def setup_logging(log_level: str = "INFO", log_format: str = "text") -> None:
     """
     Configure application logging.
 
+    A stdout handler is installed on the root logger unless one is already
+    configured; the level is always applied.
+
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        log_format: ``text`` for human-readable lines, ``json`` for one JSON object per line
     """
-    logging.basicConfig(
-        level=getattr(logging, log_level),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ],
-    )
+    # Record fields the format never uses; skip collecting them per record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, log_level))
 
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        if log_format == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT, style="%"))
+        root.addHandler(handler)